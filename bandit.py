@@ -1,4 +1,71 @@
-import random
+import numpy as np
+
+# Largest number of arms for which the best-arm search is unrolled into specialized Python code
+MAX_UNROLLED_ARMS = 8
+
+
+def _specialize_best_open_arm(n_arms):
+    """
+    Generates a best-open-arm search unrolled for a fixed number of arms.
+
+    For the handful of arms typical of a clinical trial, a straight-line scalar comparison is faster than the
+    call overhead of the equivalent NumPy expression.
+
+    Parameters:
+    -----------
+    n_arms : int
+        Number of treatment arms.
+
+    Returns:
+    --------
+    function:
+        A function taking the rates and open arrays and returning the index of the open arm with the highest
+        rate (0 if no arm is open).
+    """
+    lines = ["def best_open_arm(rates, open_arms):",
+             "    r = rates.tolist()",
+             "    o = open_arms.tolist()",
+             "    best = 0",
+             "    best_rate = -inf"]
+    for k in range(n_arms):
+        lines.append(f"    if o[{k}] and r[{k}] > best_rate:")
+        lines.append(f"        best = {k}")
+        lines.append(f"        best_rate = r[{k}]")
+    lines.append("    return best")
+    namespace = {"inf": float("inf")}
+    exec("\n".join(lines), namespace)
+    return namespace["best_open_arm"]
+
+
+def _aligned_rows(n_arms, dtypes, alignment=64):
+    """
+    Allocates one zero-filled buffer holding a row of `n_arms` elements per dtype, with every row starting on
+    its own `alignment`-byte (cache line) boundary.
+
+    Parameters:
+    -----------
+    n_arms : int
+        Number of elements in each row.
+    dtypes : list
+        Data type of each row, in buffer order.
+    alignment : int
+        Required alignment of each row in bytes.
+
+    Returns:
+    --------
+    list:
+        One contiguous, zero-filled 1-D array per dtype, all views into the same buffer.
+    """
+    row_sizes = [n_arms * np.dtype(dtype).itemsize for dtype in dtypes]
+    row_strides = [-(-size // alignment) * alignment for size in row_sizes]  # Pad each row to whole cache lines
+    buffer = np.zeros(sum(row_strides) + alignment, np.uint8)
+    offset = -buffer.ctypes.data % alignment
+    rows = []
+    for dtype, size, stride in zip(dtypes, row_sizes, row_strides):
+        rows.append(buffer[offset:offset + size].view(dtype))
+        offset += stride
+    return rows
+
 
 class MultiArmedBanditEnv:
     """
@@ -8,33 +75,68 @@ class MultiArmedBanditEnv:
 
     Attributes:
     -----------
-    treatments : list
-        A list of available treatment types.
+    treatments : tuple
+        The available treatment types.
+    n_arms : int
+        Number of treatment arms.
     max_patients_per_arm : int
         Maximum number of patients that can be assigned to each treatment arm.
-    patients_assigned : dict
-        A dictionary that keeps track of the number of patients assigned to each treatment arm.
-    successes : dict
-        A dictionary that stores the number of successful treatments for each treatment arm.
-    failures : dict
-        A dictionary that stores the number of failed treatments for each treatment arm.
+    rng : numpy.random.Generator
+        Random number generator used for exploration and Thompson sampling.
+    u : numpy.ndarray
+        Pregenerated uniform draw for each patient, deciding whether to explore.
+    rnd_arms : numpy.ndarray
+        Pregenerated random treatment arm for each patient, used when exploring.
+    patients_assigned : numpy.ndarray
+        The number of patients assigned to each treatment arm, indexed by treatment index.
+    successes : numpy.ndarray
+        The number of successful treatments for each treatment arm.
+    failures : numpy.ndarray
+        The number of failed treatments for each treatment arm.
     total_patients : int
         Total number of patients in the trial.
-    time_to_discovery : dict
-        Tracks the time to the first successful treatment for each treatment arm.
-    costs : dict
+    time_to_discovery : numpy.ndarray
+        Tracks the time to the first successful treatment for each treatment arm (-1 until the first success).
+    costs : numpy.ndarray
         Accumulates the cost of treatments for each arm.
+    rates : numpy.ndarray
+        The observed success rate of each treatment arm, kept up to date by `update_rewards`.
+    open : numpy.ndarray
+        Boolean mask of the treatment arms that have not yet reached their patient capacity.
+    open_count : int
+        Number of treatment arms that have not yet reached their patient capacity.
+    done : bool
+        Whether every treatment arm is full, so no more patients can be allocated.
+    best_arm : int
+        Index of the open treatment arm with the highest observed success rate.
 
     Methods:
     --------
-    allocate_patient()
+    allocate_patient(i)
         Allocates a patient to a treatment arm based on the exploration-exploitation strategy.
     
     update_rewards(treatment, success, cost, time)
         Updates the environment's state based on the treatment outcome (success/failure), cost, and time.
+
+    allocate_batch(batch_size)
+        Allocates a batch of patients to treatment arms using Thompson sampling.
+
+    update_batch(arms, success, cost, time)
+        Updates the environment's state with the outcomes of a batch of patients.
+
+    refresh()
+        Recomputes the success rates, open arms, and best arm from the counters.
+
+    get_success_rates()
+        Returns the success rate and number of patients assigned for each treatment arm.
     """
-    
-    def __init__(self, treatments, max_patients_per_arm):
+
+    # All per-arm state lives in NumPy arrays, so instances need no per-instance __dict__
+    __slots__ = ('treatments', 'n_arms', 'max_patients_per_arm', 'rng', 'u', 'rnd_arms',
+                 'patients_assigned', 'successes', 'failures', 'total_patients', 'time_to_discovery', 'costs',
+                 'rates', 'open', 'open_count', 'best_arm', '_best', '_report', '_report_patients')
+
+    def __init__(self, treatments, max_patients_per_arm, n_patients, seed=None):
         """
         Initializes the MultiArmedBanditEnv with a set of treatments and a maximum number of patients allowed per arm.
 
@@ -44,37 +146,72 @@ class MultiArmedBanditEnv:
             A list of treatment types available for the clinical trial.
         max_patients_per_arm : int
             Maximum number of patients that can be assigned to each treatment arm.
+        n_patients : int
+            Number of patients in the trial, for which the exploration draws are pregenerated.
+        seed : int, optional
+            Seed for the random number generator.
         """
-        self.treatments = treatments
+        self.treatments = tuple(treatments)
+        self.n_arms = n_arms = len(self.treatments)
         self.max_patients_per_arm = max_patients_per_arm
-        self.patients_assigned = {treatment: 0 for treatment in treatments}  # Tracks patients assigned to each arm
-        self.successes = {treatment: 0 for treatment in treatments}  # Tracks successful treatments for each arm
-        self.failures = {treatment: 0 for treatment in treatments}  # Tracks failed treatments for each arm
+        self.rng = np.random.default_rng(seed)
+        self.u = self.rng.random(n_patients)  # Exploration draw for each patient
+        self.rnd_arms = self.rng.integers(0, n_arms, n_patients)  # Random arm for each patient when exploring
+        # Pack the per-arm state into one buffer with every row on its own cache line, so that for up to 8 arms
+        # each row is a single line; the rates and open rows read by the best-arm search sit next to each other
+        (self.patients_assigned,  # Tracks patients assigned to each arm
+         self.successes,  # Tracks successful treatments for each arm
+         self.failures,  # Tracks failed treatments for each arm
+         self.time_to_discovery,  # Time to first success for each arm (-1 if none)
+         self.costs,  # Total costs for each arm
+         self.rates,  # Observed success rate for each arm
+         self.open,  # Arms that can still accept patients
+         ) = _aligned_rows(n_arms, [np.int64] * 4 + [np.float64] * 2 + [bool])
+        self.time_to_discovery[:] = -1
+        np.less(self.patients_assigned, self.max_patients_per_arm, out=self.open)
         self.total_patients = 0  # Total number of patients in the clinical trial
-        self.time_to_discovery = {treatment: 0 for treatment in treatments}  # Time to first success for each arm
-        self.costs = {treatment: 0 for treatment in treatments}  # Total costs for each arm
+        self.open_count = int(self.open.sum())  # Number of arms that can still accept patients
+        self.best_arm = 0  # Open arm with the highest observed success rate
+        # Best-open-arm search specialized for this number of arms, if it is small enough to unroll
+        self._best = _specialize_best_open_arm(n_arms) if n_arms <= MAX_UNROLLED_ARMS else None
+        self._report = None  # Cached get_success_rates() result
+        self._report_patients = -1  # Value of total_patients when the cached result was computed
+
+    @property
+    def done(self):
+        """
+        Whether every treatment arm has reached its patient capacity, so the simulation can stop early.
+        """
+        return self.open_count == 0
 
-    def allocate_patient(self):
+    def allocate_patient(self, i):
         """
         Allocates a patient to a treatment arm based on an epsilon-greedy exploration-exploitation strategy.
 
         The strategy balances between exploring random treatments (exploration) and exploiting the treatment 
         with the highest observed success rate (exploitation).
 
+        Parameters:
+        -----------
+        i : int
+            The index of the patient, selecting its pregenerated random draws.
+
         Returns:
         --------
-        str or None:
-            The selected treatment arm, or None if the maximum number of patients per arm is reached.
+        int or None:
+            The index of the selected treatment arm, or None if the maximum number of patients per arm is reached.
+            Once every arm is full (see `done`), None is always returned and the caller should stop allocating.
         """
+        if self.done:
+            return None  # Every treatment arm is full
+
         epsilon = 0.1  # Exploration rate: 10% chance to randomly explore a treatment
-        if random.random() < epsilon:
+        if self.u[i] < epsilon:
             # Randomly select a treatment (exploration)
-            treatment = random.choice(self.treatments)
+            treatment = int(self.rnd_arms[i])
         else:
-            # Exploit: select the treatment with the highest success rate
-            success_rates = {treatment: self.successes[treatment] / (self.successes[treatment] + self.failures[treatment] + 1)
-                             for treatment in self.treatments}
-            treatment = max(success_rates, key=success_rates.get)
+            # Exploit: select the open treatment with the highest success rate
+            treatment = self.best_arm
 
         # Ensure the treatment arm has not reached its patient capacity
         if self.patients_assigned[treatment] >= self.max_patients_per_arm:
@@ -89,8 +226,8 @@ class MultiArmedBanditEnv:
 
         Parameters:
         -----------
-        treatment : str
-            The treatment arm to which the patient was assigned.
+        treatment : int
+            The index of the treatment arm to which the patient was assigned.
         success : bool
             A boolean indicating if the treatment was successful (True) or not (False).
         cost : int
@@ -106,7 +243,7 @@ class MultiArmedBanditEnv:
             # Increment successes for the treatment
             self.successes[treatment] += 1
             # If it's the first success, record the time to discovery
-            if self.successes[treatment] == 1:
+            if self.time_to_discovery[treatment] < 0:
                 self.time_to_discovery[treatment] = time
         else:
             # Increment failures for the treatment
@@ -116,3 +253,126 @@ class MultiArmedBanditEnv:
         self.patients_assigned[treatment] += 1
         self.costs[treatment] += cost
         self.total_patients += 1  # Increase total number of patients treated
+
+        # Only this arm's success rate changed, so update it and the best arm incrementally
+        previous_rate = self.rates[treatment]
+        self.rates[treatment] = self.successes[treatment] / (self.successes[treatment] + self.failures[treatment] + 1)
+        if self.open[treatment] and self.patients_assigned[treatment] >= self.max_patients_per_arm:
+            # The arm just became full, so mask it out of exploitation
+            self.open[treatment] = False
+            self.open_count -= 1
+            if treatment == self.best_arm:
+                self.best_arm = self._best_open_arm()
+        elif self.open[treatment] and self.rates[treatment] > self.rates[self.best_arm]:
+            self.best_arm = treatment
+        elif treatment == self.best_arm and self.rates[treatment] < previous_rate:
+            # The best arm got worse, so another arm may have overtaken it
+            self.best_arm = self._best_open_arm()
+
+    def _best_open_arm(self):
+        """
+        Returns the index of the open treatment arm with the highest success rate, masking full arms out.
+        """
+        if self._best is not None:
+            return self._best(self.rates, self.open)
+        return int(np.argmax(np.where(self.open, self.rates, -np.inf)))
+
+    def allocate_batch(self, batch_size):
+        """
+        Allocates a batch of patients to treatment arms using Thompson sampling.
+
+        For each patient, one sample is drawn from the Beta(successes + 1, failures + 1) posterior of every
+        treatment arm and the arm with the highest sample is selected. Patients whose arm would exceed its
+        capacity (counting earlier patients of the same batch) are rejected.
+
+        Parameters:
+        -----------
+        batch_size : int
+            The number of patients to allocate.
+
+        Returns:
+        --------
+        tuple:
+            - arms (numpy.ndarray): The index of the selected treatment arm for each patient.
+            - accepted (numpy.ndarray): Boolean mask of the patients whose arm still had capacity.
+        """
+        samples = self.rng.beta(self.successes + 1, self.failures + 1, size=(batch_size, self.n_arms))
+        samples[:, ~self.open] = -np.inf  # Never select an arm that is already full
+        arms = np.argmax(samples, axis=1)
+
+        # Position of each patient among the patients of the same arm in this batch (1-based)
+        rank = np.cumsum(arms[:, None] == np.arange(self.n_arms), axis=0)[np.arange(batch_size), arms]
+        accepted = self.patients_assigned[arms] + rank <= self.max_patients_per_arm
+        return arms, accepted
+
+    def update_batch(self, arms, success, cost, time):
+        """
+        Updates the internal state of the environment after a batch of patients is treated.
+
+        Parameters:
+        -----------
+        arms : numpy.ndarray
+            The index of the treatment arm to which each patient was assigned.
+        success : numpy.ndarray
+            The treatment status (0 = Failure, 1 = Success) of each patient.
+        cost : numpy.ndarray
+            The cost incurred for each patient's treatment.
+        time : numpy.ndarray
+            The time taken for each patient's treatment.
+
+        Returns:
+        --------
+        None
+        """
+        success = success.astype(bool)
+
+        # Record the time to discovery for arms getting their first success in this batch
+        success_rows = np.flatnonzero(success)
+        first_arms, first = np.unique(arms[success_rows], return_index=True)
+        new = self.time_to_discovery[first_arms] < 0
+        self.time_to_discovery[first_arms[new]] = time[success_rows[first[new]]]
+
+        np.add.at(self.successes, arms[success], 1)
+        np.add.at(self.failures, arms[~success], 1)
+        np.add.at(self.patients_assigned, arms, 1)
+        np.add.at(self.costs, arms, cost)
+        self.total_patients += len(arms)
+
+        # Many arms may have changed, so recompute all success rates at once
+        self.refresh()
+
+    def refresh(self):
+        """
+        Recomputes the success rates, open arms, and best arm from the counters, for use after the counters
+        have been updated in bulk (e.g. by a compiled rollout).
+
+        Returns:
+        --------
+        None
+        """
+        np.divide(self.successes, self.successes + self.failures + 1, out=self.rates)
+        np.less(self.patients_assigned, self.max_patients_per_arm, out=self.open)
+        self.open_count = int(self.open.sum())
+        self.best_arm = self._best_open_arm()
+        self._report_patients = -1  # The rates changed, so the cached get_success_rates() result is stale
+
+    def get_success_rates(self):
+        """
+        Returns the success rate and number of patients assigned for each treatment arm.
+
+        The success rates are read from the live `rates` array rather than recomputed. The result is cached
+        and only rebuilt once more patients have been treated or the counters are refreshed, so repeated calls
+        (e.g. for logging) are cheap. Each call returns fresh dict copies.
+
+        Returns:
+        --------
+        tuple:
+            - success_rates (dict): The success rate of each treatment arm.
+            - total_trials (dict): The number of patients assigned to each treatment arm.
+        """
+        if self._report_patients != self.total_patients:
+            self._report = (dict(zip(self.treatments, self.rates.tolist())),
+                            dict(zip(self.treatments, self.patients_assigned.tolist())))
+            self._report_patients = self.total_patients
+        success_rates, total_trials = self._report
+        return dict(success_rates), dict(total_trials)  # Copies, so callers cannot alter the cached result
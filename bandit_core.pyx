@@ -0,0 +1,92 @@
+# cython: boundscheck=False, wraparound=False
+import numpy as np
+
+
+cdef inline Py_ssize_t _best_open_arm(const long long[::1] successes, const long long[::1] n,
+                                      const long long[::1] assigned, long long max_per_arm) noexcept nogil:
+    """
+    Returns the index of the treatment arm with the highest success rate successes / n among the arms that
+    still have capacity, or -1 if every arm is full.
+    """
+    cdef Py_ssize_t k, best_arm = -1
+    cdef long long best_s = 0, best_n = 1
+    for k in range(successes.shape[0]):
+        if assigned[k] < max_per_arm and (best_arm < 0 or successes[k] * best_n > best_s * n[k]):
+            best_arm = k
+            best_s = successes[k]
+            best_n = n[k]
+    return best_arm
+
+
+def run(successes, failures, assigned, costs, ttd, status, cost, time, max_per_arm, epsilon, u, rnd_arms):
+    """
+    Runs the full epsilon-greedy rollout of the clinical trial in a single ahead-of-time compiled loop.
+
+    This is a replacement for `simulate.run` that needs no JIT warmup; see that function for the description
+    of the algorithm and of the parameters. The per-patient inputs (status, cost, time, u, rnd_arms) are
+    converted to the dtypes the loop needs, but the counter arrays are mutated in place and so must already be
+    C-contiguous int64 arrays (float64 for costs).
+
+    Returns:
+    --------
+    int:
+        The number of patients allocated to a treatment arm.
+    """
+    return _run(successes, failures, assigned, costs, ttd,
+                np.ascontiguousarray(status, dtype=np.int8), np.ascontiguousarray(cost, dtype=np.float64),
+                np.ascontiguousarray(time, dtype=np.int64), max_per_arm, epsilon,
+                np.ascontiguousarray(u, dtype=np.float64), np.ascontiguousarray(rnd_arms, dtype=np.int64))
+
+
+cdef long long _run(long long[::1] successes, long long[::1] failures, long long[::1] assigned,
+                    double[::1] costs, long long[::1] ttd, const signed char[::1] status,
+                    const double[::1] cost, const long long[::1] time, long long max_per_arm, double epsilon,
+                    const double[::1] u, const long long[::1] rnd_arms):
+    cdef Py_ssize_t n_arms = successes.shape[0]
+    cdef long long[::1] n = np.empty(n_arms, dtype=np.int64)  # Denominator of each arm's success rate
+    cdef Py_ssize_t i, k, arm, best_arm
+    cdef long long total = 0
+
+    for k in range(n_arms):
+        n[k] = successes[k] + failures[k] + 1
+
+    with nogil:
+        best_arm = _best_open_arm(successes, n, assigned, max_per_arm)
+        for i in range(status.shape[0]):
+            if best_arm < 0:
+                # Every treatment arm is full
+                break
+            if u[i] < epsilon:
+                # Randomly select a treatment (exploration)
+                arm = rnd_arms[i]
+            else:
+                # Exploit: select the open treatment with the highest success rate
+                arm = best_arm
+
+            # Skip the patient if the treatment arm has reached its capacity
+            if assigned[arm] >= max_per_arm:
+                continue
+
+            if status[i]:
+                successes[arm] += 1
+                # If it's the first success, record the time to discovery
+                if ttd[arm] < 0:
+                    ttd[arm] = time[i]
+            else:
+                failures[arm] += 1
+            assigned[arm] += 1
+            costs[arm] += cost[i]
+            total += 1
+
+            # Only this arm's success rate changed, so update the best arm incrementally
+            n[arm] += 1
+            if assigned[arm] >= max_per_arm:
+                # The arm just became full, so it can no longer be exploited
+                if arm == best_arm:
+                    best_arm = _best_open_arm(successes, n, assigned, max_per_arm)
+            elif successes[arm] * n[best_arm] > successes[best_arm] * n[arm]:
+                best_arm = arm
+            elif arm == best_arm and not status[i] and successes[arm] > 0:
+                # A failure lowered the best arm's rate, so another arm may have overtaken it
+                best_arm = _best_open_arm(successes, n, assigned, max_per_arm)
+    return total
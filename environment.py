@@ -9,12 +9,16 @@ class ClinicalTrialEnv:
 
     Attributes:
     -----------
-    treatments : pandas.DataFrame
-        A DataFrame containing treatment data, including treatment type and success/failure status.
+    codes : numpy.ndarray
+        The integer treatment type code of each patient, indexing into `bandit_size`.
+    status : numpy.ndarray
+        The treatment status (0 = Failure, 1 = Success) of each patient.
     bandit_size : numpy.ndarray
         Unique treatment types being tested in the clinical trial.
-    state : dict
-        A dictionary that tracks the performance (success/failure) of each treatment type.
+    trials : numpy.ndarray
+        The number of trials conducted for each treatment type.
+    succ : numpy.ndarray
+        The number of successful trials for each treatment type.
 
     Methods:
     --------
@@ -28,19 +32,24 @@ class ClinicalTrialEnv:
         Displays the overall results of the clinical trial, including success rates and number of trials for each treatment type.
     """
 
-    def __init__(self, treatments):
+    def __init__(self, codes, treatments, status):
         """
         Initializes the ClinicalTrialEnv with a dataset of treatments.
 
         Parameters:
         -----------
-        treatments : pandas.DataFrame
-            A DataFrame containing information about treatments, including the treatment type and 
-            the success/failure status (0 = Failure, 1 = Success).
+        codes : numpy.ndarray
+            The integer treatment type code of each patient, as produced by dictionary-encoding the treatment types.
+        treatments : numpy.ndarray
+            The unique treatment types, indexed by code.
+        status : numpy.ndarray
+            The treatment status (0 = Failure, 1 = Success) of each patient.
         """
-        self.treatments = treatments
-        self.bandit_size = self.treatments['Treatment Type'].unique()  # Get unique treatment types
-        self.state = {}
+        self.codes = codes
+        self.status = status
+        self.bandit_size = treatments  # Unique treatment types
+        self.trials = np.zeros(len(self.bandit_size), np.int64)
+        self.succ = np.zeros(len(self.bandit_size), np.int64)
         self.reset()
 
     def step(self, row_index):
@@ -50,29 +59,30 @@ class ClinicalTrialEnv:
         Parameters:
         -----------
         row_index : int
-            The index of the row in the treatments DataFrame to evaluate.
+            The index of the patient to evaluate.
 
         Returns:
         --------
         tuple:
-            - state (dict): The updated state of the environment.
+            - state (tuple): The updated (trials, successes) counters of the environment.
             - reward (int): Reward of 1 for success, -1 for failure.
             - done (bool): Always returns False (for multi-step trials).
             - None: Placeholder for future debugging information.
         """
-        # Get the treatment status (0 = Failure, 1 = Success) and treatment type from the DataFrame
-        treatment_status = self.treatments.iloc[row_index]['Treatment status(0=Failure,1=Success)']
-        selected_treatment = self.treatments.iloc[row_index]['Treatment Type']
+        # Get the treatment status (0 = Failure, 1 = Success) and treatment type code for the patient
+        treatment_status = self.status[row_index]
+        i = self.codes[row_index]
         
         # Reward based on success (1 for success, -1 for failure)
         reward = 1 if treatment_status == 1 else -1
         
-        # Update the state by appending the treatment result (success or failure)
-        self.state[selected_treatment].append(treatment_status)
+        # Update the trial and success counters for the treatment
+        self.trials[i] += 1
+        self.succ[i] += treatment_status
         
         # No "done" condition for now, so always False
         done = False
-        return self.state, reward, done, None
+        return (self.trials, self.succ), reward, done, None
 
     def reset(self):
         """
@@ -80,25 +90,23 @@ class ClinicalTrialEnv:
 
         Returns:
         --------
-        dict:
-            The initial state of the environment with empty lists for each treatment type.
+        tuple:
+            The initial (trials, successes) counters of the environment, zeroed for each treatment type.
         """
-        # Initialize the state as an empty list for each treatment type
-        self.state = {treatment_type: [] for treatment_type in self.bandit_size}
-        return self.state
+        # Clear the trial and success counters for each treatment type
+        self.trials[:] = 0
+        self.succ[:] = 0
+        return self.trials, self.succ
 
     def render(self):
         """
         Displays the results of the clinical trial, including the success rate and total number of trials 
         for each treatment type.
         """
-        # Calculate total trials and total successes (returns) for each treatment
-        total_trials = {treatment: len(self.state[treatment]) for treatment in self.bandit_size}
-        total_returns = {treatment: sum(self.state[treatment]) for treatment in self.bandit_size}
+        # Calculate the success rate of every treatment type at once (0 for untried treatments)
+        rates = self.succ / np.maximum(self.trials, 1)
 
         # Display trial results
         print("\n=== Clinical Trial Results ===")
-        for treatment in self.bandit_size:
-            # Calculate success rate for each treatment type
-            success_rate = total_returns[treatment] / total_trials[treatment] if total_trials[treatment] > 0 else 0
-            print(f"Treatment: {treatment}: Success Rate: {success_rate:.4f}, Trials: {total_trials[treatment]}")
+        for i, treatment in enumerate(self.bandit_size):
+            print(f"Treatment: {treatment}: Success Rate: {rates[i]:.4f}, Trials: {self.trials[i]}")
@@ -1,44 +1,88 @@
-import pandas as pd
-from environment import ClinicalTrialEnv, MultiArmedBanditEnv
+import numpy as np
+import pyarrow.csv as pc
+from bandit import MultiArmedBanditEnv
+from environment import ClinicalTrialEnv
 
-# Load clinical trial data from a CSV file
+# Prefer the ahead-of-time compiled Cython rollout, which has no JIT warmup, and fall back to the Numba one
+try:
+    from bandit_core import run
+except ImportError:
+    from simulate import run
+
+# Load clinical trial data from a CSV file with pyarrow's multi-threaded CSV reader
 # The data should contain columns for treatment type, treatment status, budget, and time
-data = pd.read_csv("data/cancer.csv")
+data = pc.read_csv("data/cancer.csv")
+n_patients = data.num_rows
+
+# Encode the treatment types once as integer codes, along with the unique treatment types they index
+encoded = data['Treatment Type'].combine_chunks().dictionary_encode()
+codes = encoded.indices.to_numpy()
+treatments = encoded.dictionary.to_numpy(zero_copy_only=False)
+
+# Extract the success status, cost, and time columns once as contiguous NumPy arrays
+# so the simulation loop indexes raw arrays instead of going through a table for every patient
+status_arr = data['Treatment status(0=Failure,1=Success)'].to_numpy().astype(np.int8)
+cost_arr = data['budget(in dollars)'].to_numpy().astype(np.float64)
+time_arr = data['Time(In days)'].to_numpy().astype(np.int64)
 
 # Instantiate the ClinicalTrialEnv environment
 # This environment simulates a clinical trial where different treatments are applied to patients
-env = ClinicalTrialEnv(data)
+env = ClinicalTrialEnv(codes, treatments, status_arr)
 
 # Render the initial state of the clinical trial environment
 # This will show the number of trials and success rates for each treatment type
 env.render()
 
-# Define unique treatment types from the dataset and the maximum number of patients per treatment arm
-treatments = data['Treatment Type'].unique()  # List of unique treatments in the dataset
+# Define the maximum number of patients per treatment arm
 max_patients_per_arm = 100  # Limit on the number of patients per treatment arm
+epsilon = 0.1  # Exploration rate: 10% chance to randomly explore a treatment
+strategy = "thompson"  # Allocation strategy: "thompson" or "epsilon-greedy"
+batch_size = 256  # Number of patients allocated at once with Thompson sampling
+n_replicates = 0  # Number of independent epsilon-greedy replicates used to estimate variability (0 to skip)
 
 # Instantiate the Multi-Armed Bandit environment
 # This environment uses a multi-armed bandit approach to allocate patients to different treatment arms
-bandit_env = MultiArmedBanditEnv(treatments, max_patients_per_arm)
+bandit_env = MultiArmedBanditEnv(treatments, max_patients_per_arm, n_patients)
 
-# Simulate the clinical trial by iterating over the data
+# Simulate the clinical trial over the whole dataset
 # For each patient in the dataset, we allocate them to a treatment arm using the multi-armed bandit strategy
-# The success, cost, and time for each treatment are recorded and used to update the environment's state
-for i in range(len(data)):
-    treatment = bandit_env.allocate_patient()  # Allocate a patient to a treatment arm
-    if treatment is not None:
-        # Extract the success status, cost, and time from the dataset for the current patient
-        success = data.iloc[i]['Treatment status(0=Failure,1=Success)']
-        cost = data.iloc[i]['budget(in dollars)']
-        time = data.iloc[i]['Time(In days)']
-        
-        # Update the bandit environment with the treatment outcome (success/failure), cost, and time
-        bandit_env.update_rewards(treatment, success, cost, time)
+# The success, cost, and time for each treatment are recorded in the bandit environment's counter arrays
+if strategy == "thompson":
+    # Allocate patients in blocks, drawing the Thompson samples for a whole block at once
+    for start in range(0, n_patients, batch_size):
+        if bandit_env.done:
+            break  # Every treatment arm is full
+        block = slice(start, min(start + batch_size, n_patients))
+        arms, accepted = bandit_env.allocate_batch(block.stop - block.start)
+        bandit_env.update_batch(arms[accepted], status_arr[block][accepted],
+                                cost_arr[block][accepted], time_arr[block][accepted])
+else:
+    # Run the epsilon-greedy rollout in a single compiled loop
+    bandit_env.total_patients += run(bandit_env.successes, bandit_env.failures, bandit_env.patients_assigned,
+                                     bandit_env.costs, bandit_env.time_to_discovery,
+                                     status_arr, cost_arr, time_arr, max_patients_per_arm, epsilon,
+                                     bandit_env.u, bandit_env.rnd_arms)
+    bandit_env.refresh()
 
 # After all patients have been processed, display the success rates for each treatment
 success_rates, total_trials = bandit_env.get_success_rates()
 
 # Print the success rates and number of trials for each treatment arm
-print("\nSuccess Rates:")
+print(f"\nSuccess Rates ({strategy}):")
 for treatment, success_rate in success_rates.items():
     print(f"Treatment {treatment}: Success Rate: {success_rate:.4f}")
+
+# Optionally estimate the variability of the epsilon-greedy success rates by running independent replicates of the
+# trial in parallel (imported only here so that numba is never imported when the Cython rollout is used)
+if n_replicates:
+    from simulate import run_many
+
+    rng = np.random.default_rng()
+    replicate_rates = run_many(status_arr, cost_arr, time_arr, len(treatments), max_patients_per_arm, epsilon,
+                               rng.random((n_replicates, n_patients)),
+                               rng.integers(0, len(treatments), (n_replicates, n_patients)))
+
+    # Print the mean and standard deviation of the success rates over all replicates
+    print(f"\nEpsilon-Greedy Success Rates over {n_replicates} Replicates:")
+    for treatment, mean, std in zip(treatments, replicate_rates.mean(axis=0), replicate_rates.std(axis=0)):
+        print(f"Treatment {treatment}: Mean Success Rate: {mean:.4f}, Std: {std:.4f}")
@@ -0,0 +1,12 @@
+import numpy as np
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+# Builds the ahead-of-time compiled rollout (requires Cython): python setup.py build_ext --inplace
+# Project metadata and build requirements live in pyproject.toml
+setup(
+    ext_modules=cythonize(
+        [Extension("bandit_core", ["bandit_core.pyx"], include_dirs=[np.get_include()])],
+        language_level=3,
+    ),
+)
@@ -0,0 +1,152 @@
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def _best_open_arm(successes, n, assigned, max_per_arm):
+    """
+    Returns the index of the treatment arm with the highest success rate successes / n among the arms that
+    still have capacity, or -1 if every arm is full.
+
+    Rates are compared by cross-multiplying the integer counts, so no division is needed.
+    """
+    best_arm = -1
+    best_s = 0
+    best_n = 1
+    for k in range(successes.shape[0]):
+        if assigned[k] < max_per_arm and (best_arm < 0 or successes[k] * best_n > best_s * n[k]):
+            best_arm = k
+            best_s = successes[k]
+            best_n = n[k]
+    return best_arm
+
+
+@njit(cache=True)
+def run(successes, failures, assigned, costs, ttd, status, cost, time, max_per_arm, epsilon, u, rnd_arms):
+    """
+    Runs the full epsilon-greedy rollout of the clinical trial in a single compiled loop.
+
+    Each patient is allocated to a treatment arm (exploring a random arm with probability epsilon,
+    otherwise exploiting the arm with the highest observed success rate) and, if that arm still has
+    capacity, the outcome is recorded. Full arms are never exploited, and the rollout stops early once
+    every arm is full. The counter arrays are mutated in place.
+
+    Success rates successes / (successes + failures + 1) are only ever compared, never stored, so the
+    comparisons cross-multiply integer counts and the loop performs no division.
+
+    Parameters:
+    -----------
+    successes : numpy.ndarray
+        Number of successful treatments for each treatment arm.
+    failures : numpy.ndarray
+        Number of failed treatments for each treatment arm.
+    assigned : numpy.ndarray
+        Number of patients assigned to each treatment arm.
+    costs : numpy.ndarray
+        Accumulated cost of treatments for each treatment arm.
+    ttd : numpy.ndarray
+        Time to the first successful treatment for each treatment arm (-1 until the first success).
+    status : numpy.ndarray
+        Treatment status (0 = Failure, 1 = Success) for each patient.
+    cost : numpy.ndarray
+        Cost of the treatment for each patient.
+    time : numpy.ndarray
+        Time taken for the treatment for each patient.
+    max_per_arm : int
+        Maximum number of patients that can be assigned to each treatment arm.
+    epsilon : float
+        Exploration rate.
+    u : numpy.ndarray
+        Pregenerated uniform draw for each patient, deciding whether to explore.
+    rnd_arms : numpy.ndarray
+        Pregenerated random treatment arm for each patient, used when exploring.
+
+    Returns:
+    --------
+    int:
+        The number of patients allocated to a treatment arm.
+    """
+    n = successes + failures + 1  # Denominator of each arm's success rate
+    best_arm = _best_open_arm(successes, n, assigned, max_per_arm)
+    total = 0
+    for i in range(status.shape[0]):
+        if best_arm < 0:
+            # Every treatment arm is full
+            break
+        if u[i] < epsilon:
+            # Randomly select a treatment (exploration)
+            arm = rnd_arms[i]
+        else:
+            # Exploit: select the open treatment with the highest success rate
+            arm = best_arm
+
+        # Skip the patient if the treatment arm has reached its capacity
+        if assigned[arm] >= max_per_arm:
+            continue
+
+        if status[i]:
+            successes[arm] += 1
+            # If it's the first success, record the time to discovery
+            if ttd[arm] < 0:
+                ttd[arm] = time[i]
+        else:
+            failures[arm] += 1
+        assigned[arm] += 1
+        costs[arm] += cost[i]
+        total += 1
+
+        # Only this arm's success rate changed, so update the best arm incrementally
+        n[arm] += 1
+        if assigned[arm] >= max_per_arm:
+            # The arm just became full, so it can no longer be exploited
+            if arm == best_arm:
+                best_arm = _best_open_arm(successes, n, assigned, max_per_arm)
+        elif successes[arm] * n[best_arm] > successes[best_arm] * n[arm]:
+            best_arm = arm
+        elif arm == best_arm and not status[i] and successes[arm] > 0:
+            # A failure lowered the best arm's rate, so another arm may have overtaken it
+            best_arm = _best_open_arm(successes, n, assigned, max_per_arm)
+    return total
+
+
+@njit(parallel=True, cache=True)
+def run_many(status, cost, time, n_arms, max_per_arm, epsilon, u, rnd_arms):
+    """
+    Runs independent replicates of the epsilon-greedy rollout in parallel, each with its own counters.
+
+    Parameters:
+    -----------
+    status : numpy.ndarray
+        Treatment status (0 = Failure, 1 = Success) for each patient.
+    cost : numpy.ndarray
+        Cost of the treatment for each patient.
+    time : numpy.ndarray
+        Time taken for the treatment for each patient.
+    n_arms : int
+        Number of treatment arms.
+    max_per_arm : int
+        Maximum number of patients that can be assigned to each treatment arm.
+    epsilon : float
+        Exploration rate.
+    u : numpy.ndarray
+        Pregenerated uniform draws, one row of one draw per patient for each replicate.
+    rnd_arms : numpy.ndarray
+        Pregenerated random treatment arms, one row of one arm per patient for each replicate.
+
+    Returns:
+    --------
+    numpy.ndarray:
+        The final success rate of each treatment arm (columns) in each replicate (rows).
+    """
+    n_replicates = u.shape[0]
+    out = np.empty((n_replicates, n_arms))
+    for r in prange(n_replicates):
+        successes = np.zeros(n_arms, np.int64)
+        failures = np.zeros(n_arms, np.int64)
+        assigned = np.zeros(n_arms, np.int64)
+        costs = np.zeros(n_arms, np.float64)
+        ttd = np.full(n_arms, -1, np.int64)
+        run(successes, failures, assigned, costs, ttd, status, cost, time, max_per_arm, epsilon,
+            u[r], rnd_arms[r])
+        out[r] = successes / (successes + failures + 1)
+    return out